@@ -1,101 +1,310 @@
+import functools
+import io
+import json
 import os
 import logging
 import re
+import threading
+import types
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
-from typing import List, Dict
+from typing import Any, Callable, List, Dict, Optional, Tuple
 
+from cachetools import LRUCache, TTLCache
 from dotenv import load_dotenv
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from slack_bolt import App
 from slack_bolt.adapter.flask import SlackRequestHandler
 from flask import Flask, request
 
+try:
+    import orjson
+except ImportError:  # optional, falls back to the standard library
+    orjson = None
+
 
 load_dotenv()
-logging.basicConfig(level=logging.DEBUG)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
+logger = logging.getLogger(__name__)
+
+# Service credentials are fixed for the life of the process, so read them once.
+_CONFIG = types.SimpleNamespace(
+    slack_token=os.environ.get("SLACK_BOT_TOKEN"),
+    slack_signing_secret=os.environ.get("SLACK_SIGNING_SECRET"),
+    jira_base=os.environ.get("JIRA_BASE_URL"),
+    jira_email=os.environ.get("JIRA_EMAIL"),
+    jira_token=os.environ.get("JIRA_API_TOKEN"),
+    conf_base=os.environ.get("CONFLUENCE_BASE_URL"),
+    conf_email=os.environ.get("CONFLUENCE_EMAIL"),
+    conf_token=os.environ.get("CONFLUENCE_API_TOKEN"),
+)
+
+# Search endpoints built once from the configured base URLs; None when the
+# service's base URL is not set.
+_SLACK_SEARCH_URL = "https://slack.com/api/search.messages"
+_JIRA_SEARCH_URL = (
+    f"{_CONFIG.jira_base}/rest/api/2/search" if _CONFIG.jira_base else None
+)
+_CONFLUENCE_SEARCH_URL = (
+    f"{_CONFIG.conf_base}/wiki/rest/api/search" if _CONFIG.conf_base else None
+)
+
+# Upper bound on concurrent outbound searches across all commands. The
+# connection pool is sized to match so no worker waits for a free socket.
+MAX_SEARCH_WORKERS = 32
+
+# Shared HTTP session so connections (and their TLS handshakes) to each
+# service are reused across slash command invocations.
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=MAX_SEARCH_WORKERS,
+    # Retry only failed connects. Retrying reads or 5xx responses would hold
+    # the command longer and add load to a service that is already struggling.
+    max_retries=Retry(
+        total=2, connect=2, read=0, backoff_factor=0.1, status_forcelist=[]
+    ),
+)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+# (connect, read) timeouts in seconds. An unreachable host fails fast while
+# a slow search still gets time to answer.
+REQUEST_TIMEOUT = (3.0, 7.0)
+
+# Long-lived worker pool shared by all /search commands, so threads are not
+# spun up and torn down for every invocation.
+SEARCH_POOL = ThreadPoolExecutor(
+    max_workers=MAX_SEARCH_WORKERS, thread_name_prefix="search"
+)
+
+# Recently rendered response bodies (everything after the header line) keyed
+# by normalized query. Users tend to repeat the same searches, so a short TTL
+# avoids re-querying every service.
+# TTLCache is not thread-safe, hence the lock.
+RESULT_CACHE = TTLCache(maxsize=1024, ttl=60)
+_result_cache_lock = threading.Lock()
+
+# Last (ETag, decoded body) seen per (endpoint, query), so a repeated search
+# can be revalidated with If-None-Match and answered by a bodiless 304. Only
+# used for the Atlassian endpoints; Slack search does not send ETags.
+ETAG_CACHE = LRUCache(maxsize=1024)
+_etag_cache_lock = threading.Lock()
+
+
+@dataclass
+class BatchCall:
+    """A single service search to run as part of a batch."""
+
+    service: str
+    fn: Callable[..., List[Dict]]
+    args: Tuple[Any, ...]
+
+
+def _run_layer(calls: List[BatchCall]) -> List[Dict]:
+    """Run independent calls concurrently and collect their results.
+
+    All calls in a layer are dispatched at once; results come back in the
+    order the calls were given. A search that depends on another's output
+    belongs in a later layer built from this one's results.
+    """
+    futures = [(call.service, SEARCH_POOL.submit(call.fn, *call.args)) for call in calls]
+    return [{"service": name, "items": future.result()} for name, future in futures]
+
+
+def _decode(response: requests.Response) -> Dict:
+    """Decode a JSON response body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return json.loads(response.content)
+
+
+def _get_json(
+    url: str, query: str, headers: Optional[Dict] = None, **kwargs: Any
+) -> Tuple[requests.Response, Optional[Dict]]:
+    """GET a JSON endpoint, revalidating any previous result by its ETag.
+
+    Returns the response and its decoded body, or None as the body when the
+    request failed. A 304 reuses the body cached for the same url and query;
+    one with nothing cached (e.g. sent by an intermediary) counts as failed.
+    """
+    key = (url, query)
+    with _etag_cache_lock:
+        cached = ETAG_CACHE.get(key)
+    headers = dict(headers or {})
+    if cached is not None:
+        headers["If-None-Match"] = cached[0]
+
+    response = SESSION.get(url, headers=headers, **kwargs)
+    if response.status_code == 304:
+        return response, cached[1] if cached is not None else None
+    if not response.ok:
+        return response, None
+
+    data = _decode(response)
+    etag = response.headers.get("ETag")
+    if etag:
+        with _etag_cache_lock:
+            ETAG_CACHE[key] = (etag, data)
+    return response, data
+
+
+def _escape_query(query: str) -> str:
+    """Escape a query for use inside a double-quoted JQL/CQL string."""
+    return query.replace("\\", "\\\\").replace('"', '\\"')
+
+
+@functools.lru_cache(maxsize=256)
+def _jira_params(query: str) -> Tuple[Tuple[str, Any], ...]:
+    """Return the Jira search parameters for a query."""
+    jql = f"text ~ \"{_escape_query(query)}\" order by updated desc"
+    return (("jql", jql), ("maxResults", 5))
+
+
+@functools.lru_cache(maxsize=256)
+def _confluence_params(query: str) -> Tuple[Tuple[str, Any], ...]:
+    """Return the Confluence search parameters for a query."""
+    return (("cql", f"text ~ \"{_escape_query(query)}\""), ("limit", 5))
+
 
 # Helper functions for each service
 
 def search_slack(query: str, token: str) -> List[Dict]:
     """Search Slack messages using Slack Search API."""
-    logging.debug("Searching Slack for '%s'", query)
-    response = requests.get(
-        "https://slack.com/api/search.messages",
+    logger.debug("Searching Slack for '%s'", query)
+    response = SESSION.get(
+        _SLACK_SEARCH_URL,
         params={"query": query, "count": 5},
         headers={"Authorization": f"Bearer {token}"},
-        timeout=10,
+        timeout=REQUEST_TIMEOUT,
     )
-    if response.ok and response.json().get("ok"):
-        matches = response.json().get("messages", {}).get("matches", [])
-        logging.debug("Slack search returned %d results", len(matches))
+    # Slack answers successful searches with a 200 and a JSON body; anything
+    # else (including a stray bodiless 304) is treated as a failure.
+    data = _decode(response) if response.status_code == 200 else {}
+    if data.get("ok"):
+        matches = data.get("messages", {}).get("matches", [])
+        logger.debug("Slack search returned %d results", len(matches))
         return matches
-    logging.debug(
-        "Slack search failed with %d: %s", response.status_code, response.text
-    )
+    # Only touch response.text when it will actually be logged; it decodes
+    # the whole body.
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Slack search failed with %d: %s", response.status_code, response.text
+        )
     return []
 
-def search_jira(query: str, base_url: str, email: str, api_token: str) -> List[Dict]:
+def search_jira(query: str, email: str, api_token: str) -> List[Dict]:
     """Search Jira issues."""
-    url = f"{base_url}/rest/api/2/search"
-    jql = f"text ~ \"{query}\" order by updated desc"
-    logging.debug("Searching Jira at %s for '%s'", base_url, query)
-    response = requests.get(
-        url,
-        params={"jql": jql, "maxResults": 5},
+    logger.debug("Searching Jira at %s for '%s'", _JIRA_SEARCH_URL, query)
+    response, data = _get_json(
+        _JIRA_SEARCH_URL,
+        query,
+        params=_jira_params(query),
         auth=(email, api_token),
-        timeout=10,
+        timeout=REQUEST_TIMEOUT,
     )
-    if response.ok:
-        issues = response.json().get("issues", [])
-        logging.debug("Jira search returned %d results", len(issues))
+    if data is not None:
+        issues = data.get("issues", [])
+        logger.debug("Jira search returned %d results", len(issues))
         return issues
-    logging.debug(
-        "Jira search failed with %d: %s", response.status_code, response.text
-    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Jira search failed with %d: %s", response.status_code, response.text
+        )
     return []
 
-def search_confluence(query: str, base_url: str, email: str, api_token: str) -> List[Dict]:
+def search_confluence(query: str, email: str, api_token: str) -> List[Dict]:
     """Search Confluence pages."""
-    url = f"{base_url}/wiki/rest/api/search"
-    logging.debug("Searching Confluence at %s for '%s'", base_url, query)
-    response = requests.get(
-        url,
-        params={"cql": f"text ~ \"{query}\"", "limit": 5},
+    logger.debug("Searching Confluence at %s for '%s'", _CONFLUENCE_SEARCH_URL, query)
+    response, data = _get_json(
+        _CONFLUENCE_SEARCH_URL,
+        query,
+        params=_confluence_params(query),
         auth=(email, api_token),
-        timeout=10,
+        timeout=REQUEST_TIMEOUT,
     )
-    if response.ok:
-        results = response.json().get("results", [])
-        logging.debug("Confluence search returned %d results", len(results))
+    if data is not None:
+        results = data.get("results", [])
+        logger.debug("Confluence search returned %d results", len(results))
         return results
-    logging.debug(
-        "Confluence search failed with %d: %s", response.status_code, response.text
-    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Confluence search failed with %d: %s", response.status_code, response.text
+        )
     return []
 
 
-def summarize_results(results: List[Dict]) -> str:
-    """Return a tiny language-model style summary of all result texts."""
-    corpus = []
-    for service in results:
-        for item in service.get("items", []):
-            if service["service"] == "Slack":
-                corpus.append(item.get("text", ""))
-            elif service["service"] == "Jira":
-                corpus.append(item.get("fields", {}).get("summary", ""))
-            elif service["service"] == "Confluence":
-                corpus.append(item.get("title", ""))
-
-    text = " ".join(corpus).lower()
-    
-    # Remove URLs so they don't pollute the summary.
-    text = re.sub(r"https?://\S+", "", text)
-
-    # Split on unicode word characters so queries in Korean, Japanese,
-    # Chinese, and other languages are handled reasonably.
-    tokens = re.findall(r"\w+", text, flags=re.UNICODE)
-    stop = {
+# Searches for the services whose credentials are configured, in the order
+# their results are shown. Each takes only the query.
+_ENABLED: List[Tuple[str, Callable[[str], List[Dict]]]] = []
+if _CONFIG.slack_token:
+    _ENABLED.append(
+        ("Slack", functools.partial(search_slack, token=_CONFIG.slack_token))
+    )
+if _CONFIG.jira_base and _CONFIG.jira_email and _CONFIG.jira_token:
+    _ENABLED.append(
+        (
+            "Jira",
+            functools.partial(
+                search_jira,
+                email=_CONFIG.jira_email,
+                api_token=_CONFIG.jira_token,
+            ),
+        )
+    )
+if _CONFIG.conf_base and _CONFIG.conf_email and _CONFIG.conf_token:
+    _ENABLED.append(
+        (
+            "Confluence",
+            functools.partial(
+                search_confluence,
+                email=_CONFIG.conf_email,
+                api_token=_CONFIG.conf_token,
+            ),
+        )
+    )
+
+
+def _format_slack_item(item: Dict) -> str:
+    """Render a Slack match as a bulleted response line."""
+    return f"\t\u2022 <{item.get('permalink', '')}|{item.get('text', '(no text)')}>"
+
+
+def _format_jira_item(item: Dict) -> str:
+    """Render a Jira issue as a bulleted response line."""
+    key = item.get("key")
+    link = f"{_CONFIG.jira_base}/browse/{key}" if key else ""
+    return f"\t\u2022 <{link}|{item.get('fields', {}).get('summary', '')}>"
+
+
+def _format_confluence_item(item: Dict) -> str:
+    """Render a Confluence page as a bulleted response line."""
+    url = item.get("url")
+    link = f"{_CONFIG.conf_base}{url}" if url else ""
+    return f"\t\u2022 <{link}|{item.get('title', '')}>"
+
+
+_ITEM_FORMATTERS = {
+    "Slack": _format_slack_item,
+    "Jira": _format_jira_item,
+    "Confluence": _format_confluence_item,
+}
+
+
+# URLs are stripped from result text so they don't pollute the summary.
+_URL_RE = re.compile(r"https?://\S+", re.IGNORECASE)
+
+# Split on unicode word characters so queries in Korean, Japanese,
+# Chinese, and other languages are handled reasonably.
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_STOPWORDS = frozenset(
+    {
         "the",
         "and",
         "for",
@@ -116,16 +325,43 @@ def summarize_results(results: List[Dict]) -> str:
         "los",
         "las",
     }
-    freq = {}
-    for tok in tokens:
-        if tok in stop or len(tok) < 3:
+)
+
+
+# Per-service functions returning the text of a result item to summarize.
+_TEXT_GETTERS = {
+    "Slack": lambda item: item.get("text", ""),
+    "Jira": lambda item: item.get("fields", {}).get("summary", ""),
+    "Confluence": lambda item: item.get("title", ""),
+}
+
+
+def summarize_results(results: List[Dict]) -> str:
+    """Return a tiny language-model style summary of all result texts."""
+    # Count tokens in a single pass over the result items, without
+    # collecting or joining their texts first. Only tokens long enough to
+    # count are lowercased.
+    freq = Counter()
+    for service in results:
+        get_text = _TEXT_GETTERS.get(service["service"])
+        if get_text is None:
             continue
-        freq[tok] = freq.get(tok, 0) + 1
+        for item in service.get("items", []):
+            text = get_text(item)
+            if not text:
+                continue
+            for match in _TOKEN_RE.finditer(_URL_RE.sub("", text)):
+                tok = match.group()
+                if len(tok) < 3:
+                    continue
+                tok = tok.lower()
+                if tok not in _STOPWORDS:
+                    freq[tok] += 1
 
     if not freq:
         return ""
 
-    top_words = [w for w, _ in sorted(freq.items(), key=lambda x: x[1], reverse=True)[:5]]
+    top_words = [w for w, _ in freq.most_common(5)]
     return "Top topics: " + ", ".join(top_words) + "."
 
 
@@ -133,8 +369,8 @@ def summarize_results(results: List[Dict]) -> str:
 
 # Initialize Slack app and Flask server
 bolt_app = App(
-    token=os.environ.get("SLACK_BOT_TOKEN"),
-    signing_secret=os.environ.get("SLACK_SIGNING_SECRET"),
+    token=_CONFIG.slack_token,
+    signing_secret=_CONFIG.slack_signing_secret,
 )
 flask_app = Flask(__name__)
 handler = SlackRequestHandler(bolt_app)
@@ -149,60 +385,51 @@ def handle_search(ack, respond, command):
         respond("Please provide a search query.")
         return
 
-    slack_token = os.environ.get("SLACK_BOT_TOKEN")
-    jira_base = os.environ.get("JIRA_BASE_URL")
-    jira_email = os.environ.get("JIRA_EMAIL")
-    jira_token = os.environ.get("JIRA_API_TOKEN")
-    conf_base = os.environ.get("CONFLUENCE_BASE_URL")
-    conf_email = os.environ.get("CONFLUENCE_EMAIL")
-    conf_token = os.environ.get("CONFLUENCE_API_TOKEN")
-
-    results = []
-
-    if slack_token:
-        slack_results = search_slack(query, slack_token)
-        results.append({"service": "Slack", "items": slack_results})
-
-    if jira_base and jira_email and jira_token:
-        jira_results = search_jira(query, jira_base, jira_email, jira_token)
-        results.append({"service": "Jira", "items": jira_results})
+    # The header echoes the caller's own query, so only the body is cached.
+    header = f"*Results for:* `{query}`\n"
+    cache_key = query.strip().lower()
+    with _result_cache_lock:
+        cached = RESULT_CACHE.get(cache_key)
+    if cached is not None:
+        respond(header + cached)
+        return
 
-    if conf_base and conf_email and conf_token:
-        conf_results = search_confluence(query, conf_base, conf_email, conf_token)
-        results.append({"service": "Confluence", "items": conf_results})
+    # The searches don't depend on each other, so they form a single layer
+    # that is dispatched in one concurrent wave.
+    layer0 = [BatchCall(name, fn, (query,)) for name, fn in _ENABLED]
+    results = _run_layer(layer0)
 
     if not results:
         respond("No services configured for search.")
         return
 
-    # Build a simple message summarizing results
-    message_lines = [f"*Results for:* `{query}`\n"]
+    # Build a simple message summarizing results. Each line after the header
+    # carries its own leading newline, so no separator is written twice.
+    buf = io.StringIO()
     for service in results:
-        message_lines.append(f"*{service['service']}*:")
+        buf.write(f"\n*{service['service']}*:")
         items = service["items"]
         if not items:
-            message_lines.append("\t- No results found.")
+            buf.write("\n\t- No results found.")
         else:
+            fmt = _ITEM_FORMATTERS[service["service"]]
             for item in items:
-                if service["service"] == "Slack":
-                    text = item.get("text", "(no text)")
-                    link = item.get("permalink", "")
-                elif service["service"] == "Jira":
-                    key = item.get("key")
-                    text = item.get("fields", {}).get("summary", "")
-                    link = f"{jira_base}/browse/{key}" if key else ""
-                elif service["service"] == "Confluence":
-                    text = item.get("title", "")
-                    link = f"{conf_base}{item.get('url', '')}" if item.get('url') else ""
-                message_lines.append(f"\t\u2022 <{link}|{text}>")
-        message_lines.append("")
+                buf.write("\n")
+                buf.write(fmt(item))
+        buf.write("\n")
 
     summary = summarize_results(results)
     if summary:
-        message_lines.append("*Summary:*")
-        message_lines.append(summary)
+        buf.write("\n*Summary:*\n")
+        buf.write(summary)
 
-    respond("\n".join(message_lines))
+    body = buf.getvalue()
+    # Don't cache a response where every service came back empty; that is
+    # as likely to be a transient upstream failure as a real miss.
+    if any(service["items"] for service in results):
+        with _result_cache_lock:
+            RESULT_CACHE[cache_key] = body
+    respond(header + body)
 
 
 @bolt_app.command("/검색")
@@ -214,13 +441,14 @@ def handle_search_korean(ack, respond, command):
 def slack_events():
     """Endpoint for Slack slash command requests."""
     resp = handler.handle(request)
-    if 400 <= resp.status_code < 500:
-        logging.debug("/search responded with %d: %s", resp.status_code, resp.get_data(as_text=True))
+    if 400 <= resp.status_code < 500 and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("/search responded with %d: %s", resp.status_code, resp.get_data(as_text=True))
     return resp
 
 
 if __name__ == "__main__":
-    # Run the Flask app so Slack can send slash command requests to the
-    # /search endpoint. The PORT environment variable can be set by the hosting
-    # platform; default to 3000 for local testing.
+    # Run the Flask development server so Slack can send slash command
+    # requests to the /search endpoint. The PORT environment variable can be
+    # set by the hosting platform; default to 3000 for local testing. For
+    # production, serve flask_app with gunicorn instead (see the Procfile).
     flask_app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 3000)))